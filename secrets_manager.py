@@ -24,9 +24,11 @@ TEAM WORKFLOW:
 5. Optional security: python secrets_manager.py clear (removes stored password)
 """
 
+import io
 import os
 import sys
 import json
+import contextlib
 import hashlib
 import base64
 import shutil
@@ -60,10 +62,29 @@ SWEEP_MARK     = "[CLEAN]"
 ROCKET_MARK    = "[PROJECT]"
 RECYCLE_MARK   = "[CYCLE]"
 
+class _CurrentStderrHandler(logging.StreamHandler):
+    """Log handler writing to whatever sys.stderr is when a record is emitted.
+
+    A plain StreamHandler keeps the sys.stderr of the moment it was created,
+    which misses the redirection dispatch() sets up for every later command.
+    """
+
+    @property
+    def stream(self):
+        return sys.stderr
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
 # Global variable to track test mode
 _TEST_MODE = False
 TEST_PASSWORD = "test123"
 
+# PBKDF2 work factor; test mode can lower it with SM_FAST_KDF=1 to speed up test runs
+PBKDF2_ITERATIONS = 100000
+FAST_KDF_ITERATIONS = 1000
+
 # Windows credential management
 if platform.system() == "Windows":
     import ctypes
@@ -289,7 +310,7 @@ class SecretsManager:
         logger.setLevel(logging.WARNING)
 
         if not logger.handlers:
-            handler = logging.StreamHandler()
+            handler = _CurrentStderrHandler()
             formatter = logging.Formatter('%(levelname)s: %(message)s')
             handler.setFormatter(formatter)
             logger.addHandler(handler)
@@ -1445,7 +1466,11 @@ class SecretsManager:
     # Security and utility methods
     def _derive_key(self, password: str, salt: bytes) -> bytes:
         """Derive encryption key from password using PBKDF2."""
-        return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, 100000, 32)
+        iterations = PBKDF2_ITERATIONS
+        if _TEST_MODE and os.environ.get("SM_FAST_KDF") == "1":
+            # Weak on purpose: only for throwaway test vaults
+            iterations = FAST_KDF_ITERATIONS
+        return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations, 32)
 
     def _encrypt_data(self, data: bytes, key: bytes) -> Optional[bytes]:
         """Encrypt data using AES-256 (simplified implementation)."""
@@ -1676,10 +1701,56 @@ class SecretsManager:
         return datetime.now(timezone.utc).isoformat()
 
 
-def main():
-    """Main CLI interface."""
+def dispatch(argv, stdin_text: Optional[str] = None):
+    """Run one CLI command in this process, feeding stdin_text to its prompts.
+
+    Returns (exit code, captured stdout, captured stderr).
+    """
+    stdout, stderr = io.StringIO(), io.StringIO()
+    saved_stdin = sys.stdin
+    sys.stdin = io.StringIO(stdin_text or "")
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                returncode = main(argv)
+            except SystemExit as e:
+                # argparse exits on bad arguments; sys.exit() without a code means success
+                if e.code is None:
+                    returncode = 0
+                else:
+                    returncode = e.code if isinstance(e.code, int) else 1
+    finally:
+        sys.stdin = saved_stdin
+    return returncode, stdout.getvalue(), stderr.getvalue()
+
+
+def run_batch(requests, responses) -> int:
+    """Run many commands in one process (used by the test suite).
+
+    Reads one JSON request per line, {"args": [...], "input": "..."}, and
+    answers each with one JSON line {"returncode": ..., "stdout": ..., "stderr": ...}.
+    """
+    for line in iter(requests.readline, ""):
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        returncode, stdout, stderr = dispatch(request["args"], request.get("input"))
+        responses.write(json.dumps({"returncode": returncode, "stdout": stdout, "stderr": stderr}) + "\n")
+        responses.flush()
+    return 0
+
+
+def main(argv=None) -> int:
+    """Main CLI interface. Returns the process exit code."""
+    if argv is None:
+        argv = sys.argv[1:]
+
+    # Test suite driver: many commands, one process
+    if argv == ["--batch"]:
+        return run_batch(sys.stdin, sys.stdout)
+
     # Show help if no arguments provided
-    if len(sys.argv) == 1:
+    if not argv:
         print(__doc__)
         print("\nUSAGE:")
         print("  python secrets_manager.py <command> [options]")
@@ -1709,7 +1780,7 @@ def main():
         print("  --secrets-dir DIR    Secrets directory name (only for 'create' command, default: secrets)")
         print("  --password PASS      Password (only for 'create' and 'pass' commands)")
         print("  --verbose, -v        Verbose logging")
-        sys.exit(0)
+        return 0
 
     parser = argparse.ArgumentParser(
         description="Cross-Platform Secrets Manager",
@@ -1741,7 +1812,7 @@ Examples:
     parser.add_argument("--test-mode", action="store_true", help="Test mode: read passwords from stdin and auto-confirm prompts")
     parser.add_argument("--verbose", "-v", action="store_true", help="Verbose logging")
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # Setup test mode
     global _TEST_MODE
@@ -1774,57 +1845,57 @@ Examples:
         if args.command == "create":
             # Only create accepts --password, --project, --secrets-dir
             if manager.create_secrets(args.password):
-                sys.exit(0)
+                return 0
             else:
-                sys.exit(1)
+                return 1
 
         elif args.command == "mount":
             # Mount now accepts --password parameter
             if manager.mount_secrets(args.password):
-                sys.exit(0)
+                return 0
             else:
-                sys.exit(1)
+                return 1
 
         elif args.command == "unmount":
             # Unmount now accepts --password parameter
             if manager.unmount_secrets(args.password):
-                sys.exit(0)
+                return 0
             else:
-                sys.exit(1)
+                return 1
 
         elif args.command == "pass":
             # Only pass accepts --password
             if manager.store_password(args.password):
-                sys.exit(0)
+                return 0
             else:
-                sys.exit(1)
+                return 1
 
         elif args.command == "clear":
             # Clear doesn't accept any optional parameters
             if manager.clear_password():
-                sys.exit(0)
+                return 0
             else:
-                sys.exit(1)
+                return 1
 
         elif args.command == "change-password":
             # Change password doesn't accept any optional parameters
             if manager.change_password():
-                sys.exit(0)
+                return 0
             else:
-                sys.exit(1)
+                return 1
 
         elif args.command == "destroy":
             # Destroy doesn't accept any optional parameters
             if manager.destroy_project():
-                sys.exit(0)
+                return 0
             else:
-                sys.exit(1)
+                return 1
 
         elif args.command == "status":
             # Status doesn't accept any optional parameters
             status = manager.get_status()
             manager._show_helpful_status(status)
-            sys.exit(0)
+            return 0
 
     except KeyboardInterrupt:
         print("\nWARNING: Operation cancelled")
@@ -1832,11 +1903,11 @@ Examples:
         if args.command == "mount" and os.path.exists(manager.secrets_dir):
             shutil.rmtree(manager.secrets_dir, ignore_errors=True)
             print(f"{SWEEP_MARK} Cleaned up {manager.secrets_dir}/ folder")
-        sys.exit(1)
+        return 1
     except Exception as e:
         print(f"{CROSS_MARK} Error: {e}")
-        sys.exit(1)
+        return 1
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file